@@ -0,0 +1,176 @@
+"""
+api_session.py -- ChatGPTSession stand-in that talks to the OpenAI API.
+
+The browser session pays for page rendering, DOM polling and streaming UI on
+every turn. With --backend api the pipeline sends the same prompts straight
+to the Chat Completions endpoint instead. No browser and no Playwright are
+needed.
+
+Every turn re-sends the conversation so far. The history only ever grows at
+the end, so the earlier turns (role, rules, probe context) are an identical
+prefix each time, and the API's automatic prompt caching reuses it on retries.
+One HTTPS connection is kept open for the whole session, so those retries
+also skip the TCP + TLS handshake.
+
+The key comes from OPENAI_API_KEY (environment or .env). Model names map
+through API_MODELS below, using the same keys as chatgpt_selectors.MODELS.
+
+Usage:
+    with APISession(model="instant") as s:
+        response = s.prompt("Write hello world")
+        fix = s.followup("That has a bug, fix it")
+"""
+
+import base64
+import http.client
+import json
+import mimetypes
+import os
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from core import chatgpt_selectors as S
+
+ROOT = Path(__file__).resolve().parent.parent
+ENV_FILE = ROOT / ".env"
+
+API_URL = "https://api.openai.com/v1/chat/completions"
+_API = urlsplit(API_URL)
+
+# Logical model name -> API model id. Update these when OpenAI renames models.
+API_MODELS = {
+    "instant":    "gpt-5-mini",
+    "thinking":   "gpt-5",
+    "auto":       "gpt-5-mini",
+}
+
+IMAGE_TYPES = {"image/png", "image/jpeg", "image/gif", "image/webp"}
+
+
+def _api_key() -> str:
+    key = os.environ.get("OPENAI_API_KEY")
+    if key:
+        return key
+    if ENV_FILE.exists():
+        for line in ENV_FILE.read_text(encoding="utf-8").splitlines():
+            name, _, value = line.strip().partition("=")
+            if name.strip() == "OPENAI_API_KEY":
+                return value.strip()
+    raise RuntimeError("OPENAI_API_KEY not set (environment or .env)")
+
+
+class APISession:
+    """Same surface as ChatGPTSession: prompt, followup, new_chat,
+    switch_model, and _last_response_complete."""
+
+    def __init__(self, model: str = None):
+        self._model = model or S.DEFAULT_MODEL
+        self._key = None
+        self._conn = None           # kept-alive HTTPS connection, opened lazily
+        self._messages = []
+        self._last_response_complete = True
+
+    def __enter__(self):
+        self._key = _api_key()
+        return self
+
+    def __exit__(self, *args):
+        self._messages = []
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # --- Public API ---
+
+    def prompt(self, text: str, files: list = None) -> str:
+        """Start a new conversation with this prompt."""
+        self._messages = []
+        return self.followup(text, files=files)
+
+    def followup(self, text: str, files: list = None) -> str:
+        """Continue the current conversation."""
+        self._messages.append({"role": "user",
+                               "content": self._user_content(text, files)})
+        reply = self._complete()
+        self._messages.append({"role": "assistant", "content": reply})
+        return reply
+
+    def new_chat(self):
+        self._messages = []
+        print("[OK] New chat started.")
+
+    def switch_model(self, model_key: str):
+        old_model = self._model
+        self._model = model_key
+        self._messages = []
+        print(f"[OK] Switched model: {old_model} -> {model_key}")
+
+    # --- Internals ---
+
+    def _user_content(self, text: str, files: list):
+        """Plain text, or a content-parts list when files are attached.
+
+        Images go in as data URLs, everything else is inlined as text.
+        """
+        if not files:
+            return text
+        parts = [{"type": "text", "text": text}]
+        for fp in files:
+            path = Path(fp)
+            mime = mimetypes.guess_type(path.name)[0] or ""
+            try:
+                if mime in IMAGE_TYPES:
+                    data = base64.b64encode(path.read_bytes()).decode("ascii")
+                    parts.append({"type": "image_url",
+                                  "image_url": {"url": f"data:{mime};base64,{data}"}})
+                else:
+                    body = path.read_text(encoding="utf-8", errors="replace")
+                    parts.append({"type": "text",
+                                  "text": f"--- {path.name} ---\n{body}"})
+                print(f"  [ATTACH] {path.name}")
+            except OSError as e:
+                print(f"  [WARN] Could not attach {path.name}: {e}")
+        return parts
+
+    def _complete(self) -> str:
+        model = API_MODELS.get(self._model, API_MODELS[S.DEFAULT_MODEL])
+        # Whole history goes up every turn -- no whitespace between tokens
+        body = json.dumps({"model": model, "messages": self._messages},
+                          separators=(",", ":")).encode("utf-8")
+        print(f"  [API] {model}: sending {len(body)} bytes...")
+        status, raw = self._post(body)
+        if status >= 400:
+            detail = raw.decode("utf-8", errors="replace")[:300]
+            raise RuntimeError(f"API error {status}: {detail}")
+        data = json.loads(raw)
+
+        choice = data["choices"][0]
+        self._last_response_complete = choice.get("finish_reason") == "stop"
+        usage = data.get("usage") or {}
+        cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0)
+        print(f"  [API] {usage.get('prompt_tokens', '?')} prompt tokens "
+              f"({cached} cached), {usage.get('completion_tokens', '?')} completion")
+        return choice["message"].get("content") or ""
+
+    def _post(self, body: bytes) -> tuple:
+        """POST body on the kept-alive connection. Returns (status, bytes).
+
+        The server may close an idle connection between turns; that shows up
+        as a ConnectionError before any response, and is retried once on a
+        fresh connection. Timeouts are not retried.
+        """
+        headers = {"Authorization": f"Bearer {self._key}",
+                   "Content-Type": "application/json"}
+        for attempt in (1, 2):
+            if self._conn is None:
+                self._conn = http.client.HTTPSConnection(
+                    _API.hostname, _API.port, timeout=S.RESPONSE_TIMEOUT)
+            try:
+                self._conn.request("POST", _API.path, body=body, headers=headers)
+                resp = self._conn.getresponse()
+                return resp.status, resp.read()
+            except (ConnectionError, http.client.HTTPException):
+                self._conn.close()
+                self._conn = None
+                if attempt == 2:
+                    raise
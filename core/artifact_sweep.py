@@ -18,9 +18,10 @@ Usage in the pipeline:
     sweep_artifacts(pre)
 """
 
+import os
 import shutil
+import time
 from pathlib import Path
-from datetime import datetime
 
 # ---------------------------------------------------------------------------
 # Config
@@ -42,7 +43,7 @@ ROOT_IGNORE = {
     "main.py", "tests.py", "test.md",
     ".env", ".gitignore", "LLM.md", "README.md",
     "requirements.txt", "pyproject.toml", "setup.cfg",
-    "context", "core", "skills", "programs", "outputs",
+    "context", "core", "skills", "programs", "outputs", "cache",
     "raw_md", "docs", ".browser_profile", ".git",
     "__pycache__",
 }
@@ -58,24 +59,11 @@ def snapshot_dirs() -> dict:
     Returns a dict with sets of file paths that existed before the script ran.
     Call this BEFORE running the script, then pass the result to sweep_artifacts().
     """
-    snap = {
-        "root": set(),
-        "programs": set(),
+    return {
+        "root": _file_names(ROOT),          # top-level files only, not dirs
+        "programs": _file_names(PROGRAMS_DIR),
     }
 
-    # Snapshot project root (top-level files only, not dirs)
-    for p in ROOT.iterdir():
-        if p.is_file():
-            snap["root"].add(p.name)
-
-    # Snapshot programs/
-    if PROGRAMS_DIR.exists():
-        for p in PROGRAMS_DIR.iterdir():
-            if p.is_file():
-                snap["programs"].add(p.name)
-
-    return snap
-
 
 def sweep_artifacts(pre_snapshot: dict) -> list:
     """Find new non-code files created during execution and move them to outputs/.
@@ -88,37 +76,32 @@ def sweep_artifacts(pre_snapshot: dict) -> list:
     """
     OUTPUTS_DIR.mkdir(exist_ok=True)
     moved = []
+    # One timestamp per sweep: files swept together share it on collision
+    ts = time.strftime("%Y%m%d_%H%M%S")
 
     # Check project root for new files
-    for p in ROOT.iterdir():
-        if not p.is_file():
-            continue
-        if p.name in pre_snapshot["root"]:
-            continue  # existed before execution
-        if p.name in ROOT_IGNORE:
+    for name in sorted(_file_names(ROOT) - pre_snapshot["root"]):
+        if name in ROOT_IGNORE:
             continue  # known project file
-        if p.name.startswith("."):
+        if name.startswith("."):
             continue  # dotfiles
+        p = ROOT / name
         if _is_code_file(p):
             continue  # code stays
 
-        new_path = _move_to_outputs(p)
+        new_path = _move_to_outputs(p, ts)
         if new_path:
             moved.append((p, new_path))
 
     # Check programs/ for new non-code files
-    if PROGRAMS_DIR.exists():
-        for p in PROGRAMS_DIR.iterdir():
-            if not p.is_file():
-                continue
-            if p.name in pre_snapshot["programs"]:
-                continue  # existed before execution
-            if _is_code_file(p):
-                continue  # code stays in programs/
-
-            new_path = _move_to_outputs(p)
-            if new_path:
-                moved.append((p, new_path))
+    for name in sorted(_file_names(PROGRAMS_DIR) - pre_snapshot["programs"]):
+        p = PROGRAMS_DIR / name
+        if _is_code_file(p):
+            continue  # code stays in programs/
+
+        new_path = _move_to_outputs(p, ts)
+        if new_path:
+            moved.append((p, new_path))
 
     if moved:
         print(f"  [SWEEP] Moved {len(moved)} artifact(s) to outputs/")
@@ -132,25 +115,42 @@ def sweep_artifacts(pre_snapshot: dict) -> list:
 # Helpers
 # ---------------------------------------------------------------------------
 
+def _file_names(directory: Path) -> set:
+    """Names of the regular files directly in directory (empty if missing).
+
+    One scandir pass: DirEntry carries the file type, so there's no stat per
+    entry the way Path.iterdir() + is_file() needs. Runs twice per execution.
+    """
+    try:
+        with os.scandir(directory) as it:
+            return {e.name for e in it if e.is_file()}
+    except FileNotFoundError:
+        return set()
+
+
 def _is_code_file(path: Path) -> bool:
     """Check if a file is source code that should stay in place."""
     return path.suffix.lower() in CODE_EXTENSIONS
 
 
-def _move_to_outputs(src: Path) -> Path:
+def _move_to_outputs(src: Path, ts: str) -> Path:
     """Move a file to outputs/. Handles name collisions with timestamps."""
     dest = OUTPUTS_DIR / src.name
 
     if dest.exists():
-        # Add timestamp to avoid overwriting
-        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # Add the sweep timestamp (plus a counter if that's taken too,
+        # e.g. two sweeps in the same second) to avoid overwriting
         stem = src.stem
         suffix = src.suffix
         dest = OUTPUTS_DIR / f"{stem}_{ts}{suffix}"
+        n = 1
+        while dest.exists():
+            dest = OUTPUTS_DIR / f"{stem}_{ts}_{n}{suffix}"
+            n += 1
 
     try:
         shutil.move(str(src), str(dest))
         return dest
     except Exception as e:
         print(f"  [WARN] Could not move {src.name}: {e}")
-        return None
\ No newline at end of file
+        return None
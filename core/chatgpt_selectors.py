@@ -1,5 +1,5 @@
 """
-selectors.py -- ChatGPT DOM selectors (centralized for easy updates)
+chatgpt_selectors.py -- ChatGPT DOM selectors (centralized for easy updates)
 
 ChatGPT frequently changes its frontend. When automation breaks,
 update selectors HERE only. Everything else stays the same.
@@ -56,6 +56,17 @@ MODEL_MENU_ITEM_SELECTORS = {
     ],
 }
 
+# --- New Chat Button ---
+# Client-side route to a fresh conversation (no full page reload).
+# session.new_chat() tries this before falling back to a URL navigation.
+NEW_CHAT_BUTTON_SELECTORS = [
+    'a[data-testid="create-new-chat-button"]',
+    'button[data-testid="create-new-chat-button"]',
+    'a[aria-label="New chat"]',
+    'button[aria-label="New chat"]',
+]
+NEW_CHAT_BUTTON_SELECTOR = ", ".join(NEW_CHAT_BUTTON_SELECTORS)
+
 # --- Prompt Input ---
 PROMPT_TEXTAREA = "#prompt-textarea"
 
@@ -84,11 +95,38 @@ RESPONSE_COMPLETE_INDICATORS = [
     'button[aria-label="Copy"]',
 ]
 
+# Comma-joined forms of the chains above: one query_selector call (one
+# browser round-trip) matches any of them. Keep the lists as the source of
+# truth -- edit those, these follow.
+SEND_BUTTON_SELECTOR = ", ".join(SEND_BUTTON_SELECTORS)
+ASSISTANT_MESSAGE_SELECTOR = ", ".join(ASSISTANT_MESSAGE_SELECTORS)
+STOP_GENERATING_SELECTOR = ", ".join(STOP_GENERATING_SELECTORS)
+RESPONSE_COMPLETE_SELECTOR = ", ".join(RESPONSE_COMPLETE_INDICATORS)
+
+# --- Request Blocking ---
+# Resources the bot never needs. Blocked inside the browser (CDP
+# Network.setBlockedURLs in session.py) so nothing round-trips through Python
+# and the HTTP cache stays on. Stylesheets stay: visibility checks
+# (is_visible) and UI screenshots depend on layout.
+BLOCKED_EXTENSIONS = ("woff", "woff2", "ttf", "otf", "mp3", "mp4", "webm")
+BLOCKED_EXTENSIONS_HEADLESS = ("png", "jpg", "jpeg", "gif", "webp")  # nobody is looking
+# Exact tracker hostnames; each also covers its subdomains. Feature-gate
+# services (statsig) are deliberately absent: the app needs them to render.
+BLOCKED_HOSTS = (
+    "sentry.io",
+    "segment.io",
+    "segment.com",
+    "google-analytics.com",
+    "googletagmanager.com",
+    "intercom.io",
+    "intercomcdn.com",
+    "datadoghq.com",
+    "browser-intake-datadoghq.com",
+)
+
 # --- Timeouts ---
 NAVIGATION_TIMEOUT = 30      # seconds to wait for page load
 RESPONSE_TIMEOUT = 180       # max wait for response streaming
-TYPING_DELAY_MS = 30         # ms between keystrokes
-POST_SEND_DELAY = 2          # seconds after send before polling
 
 # --- File Upload ---
 # ChatGPT uses a hidden <input type="file"> that we can set directly
@@ -106,5 +144,9 @@ FILE_UPLOAD_COMPLETE_SELECTORS = [
     'img[alt="Uploaded image"]',             # image preview
 ]
 
+# Joined forms (see SEND_BUTTON_SELECTOR above), built once at import
+FILE_INPUT_SELECTOR = ", ".join(FILE_INPUT_SELECTORS)
+FILE_UPLOAD_COMPLETE_SELECTOR = ", ".join(FILE_UPLOAD_COMPLETE_SELECTORS)
+
 # How long to wait for upload processing (large files, images)
 FILE_UPLOAD_TIMEOUT = 30     # seconds
\ No newline at end of file
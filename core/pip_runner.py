@@ -0,0 +1,210 @@
+"""
+pip_runner.py -- Persistent pip subprocess for local package installs.
+
+Every `python -m pip install ...` pays interpreter startup plus the import
+of pip, resolvelib, and friends. When the LLM asks for packages on several
+attempts in one run, that cost is paid over and over. This module keeps ONE
+helper process alive (this same file, run with --serve) that imports pip
+once and then installs on demand.
+
+Protocol (one line per request, one status line per response):
+    client -> daemon:   install pkg1 pkg2 ...\\n
+    daemon -> client:   <any pip output lines>
+                        __PIP_RUNNER__ <returncode> [restart]\\n
+
+pip's internals aren't meant to be called twice in one process: its
+metadata and finder caches would describe the environment as it was before
+the last install. So the daemon serves installs only until one actually
+changes the installed packages, then exits ("restart"); the client spawns a
+fresh one right away, which imports pip while the caller carries on.
+
+Usage:
+    from core.pip_runner import pip_install
+    ok, output = pip_install(["requests", "numpy"])
+"""
+
+import atexit
+import queue
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+STATUS_PREFIX = "__PIP_RUNNER__"
+INSTALL_TIMEOUT = 120        # seconds per install batch
+
+_proc = None
+_lines = None
+_lock = threading.Lock()
+
+
+# ---------------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------------
+
+def pip_install(packages: list, timeout: int = INSTALL_TIMEOUT) -> tuple:
+    """Install packages in ONE resolver run through the persistent daemon.
+
+    Returns (success, output). Falls back to a one-shot `pip install`
+    subprocess if the daemon cannot be started or dies mid-request. A
+    timeout kills the daemon and is NOT retried -- the install may be
+    half-done, and a retry would double the wait.
+    """
+    if not packages:
+        return True, ""
+
+    with _lock:
+        proc = _ensure_daemon()
+        if proc is not None:
+            try:
+                proc.stdin.write("install " + " ".join(packages) + "\n")
+                proc.stdin.flush()
+                ok, output, restart = _read_status(timeout)
+                if restart:
+                    _shutdown()
+                    _ensure_daemon()
+                return ok, output
+            except queue.Empty:
+                _shutdown(force=True)
+                return False, f"pip install timed out after {timeout}s"
+            except (OSError, ValueError):
+                _shutdown()
+
+    return _pip_install_oneshot(packages, timeout)
+
+
+def _ensure_daemon():
+    """Launch the daemon lazily on first use. Returns the Popen or None."""
+    global _proc, _lines
+    if _proc is not None and _proc.poll() is None:
+        return _proc
+    try:
+        _proc = subprocess.Popen(
+            [sys.executable, "-u", str(Path(__file__).resolve()), "--serve"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT, text=True, bufsize=1,
+        )
+    except Exception:
+        _proc = None
+        return None
+
+    # Reader thread so we can enforce a timeout without select() (which
+    # doesn't work on pipes under Windows).
+    _lines = queue.Queue()
+
+    def _pump(stream, q):
+        try:
+            for line in iter(stream.readline, ""):
+                q.put(line)
+        except (ValueError, OSError):
+            pass
+        q.put(None)  # EOF
+
+    threading.Thread(target=_pump, args=(_proc.stdout, _lines), daemon=True).start()
+    return _proc
+
+
+def _read_status(timeout: int) -> tuple:
+    """Collect output lines until the status sentinel arrives.
+
+    Returns (success, output, restart). timeout is for the whole batch;
+    raises queue.Empty when it runs out.
+    """
+    output = []
+    deadline = time.monotonic() + timeout
+    while True:
+        line = _lines.get(timeout=max(0.0, deadline - time.monotonic()))
+        if line is None:
+            raise OSError("pip runner exited")
+        idx = line.find(STATUS_PREFIX)
+        if idx >= 0:
+            # pip progress output may not end in a newline, so the sentinel
+            # can share a line with it.
+            output.append(line[:idx])
+            rc, _, flag = line[idx + len(STATUS_PREFIX):].strip().partition(" ")
+            return int(rc or 1) == 0, "".join(output), flag == "restart"
+        output.append(line)
+
+
+def _pip_install_oneshot(packages: list, timeout: int) -> tuple:
+    try:
+        proc = subprocess.run([sys.executable, "-m", "pip", "install", *packages],
+                              capture_output=True, text=True, timeout=timeout)
+        return proc.returncode == 0, proc.stdout + proc.stderr
+    except subprocess.TimeoutExpired:
+        return False, f"pip install timed out after {timeout}s"
+
+
+def _shutdown(force: bool = False):
+    """Close the daemon's stdin (it exits on EOF) and reap it.
+
+    force=True kills it outright, for a daemon stuck mid-install.
+    """
+    global _proc
+    if _proc is None:
+        return
+    try:
+        if force:
+            _proc.kill()
+        _proc.stdin.close()
+        _proc.wait(timeout=5)
+    except Exception:
+        try:
+            _proc.kill()
+        except Exception:
+            pass
+    _proc = None
+
+
+atexit.register(_shutdown)
+
+
+# ---------------------------------------------------------------------------
+# Daemon
+# ---------------------------------------------------------------------------
+
+def _installed() -> set:
+    """(name, version) of every distribution currently on sys.path."""
+    import importlib
+    import importlib.metadata
+    importlib.invalidate_caches()
+    return {(d.metadata["Name"], d.version)
+            for d in importlib.metadata.distributions()}
+
+
+def _serve():
+    """Daemon loop: import pip once, then install per request line.
+
+    Exits after the first install that changes the environment, since
+    pip's in-process caches would be stale for the next one.
+    """
+    from pip._internal.cli.main import main as pip_main
+
+    for line in sys.stdin:
+        cmd, _, args = line.strip().partition(" ")
+        if cmd != "install" or not args:
+            print(f"{STATUS_PREFIX} 2", flush=True)
+            continue
+        before = _installed()
+        try:
+            # pip writes progress to stdout -- fine, the client treats
+            # anything before the sentinel as output.
+            rc = pip_main(["install", "--disable-pip-version-check", *args.split()])
+        except SystemExit as e:
+            # sys.exit() / sys.exit(None) means success
+            rc = 0 if e.code is None else e.code if isinstance(e.code, int) else 1
+        except Exception as e:
+            print(f"[ERROR] {e}")
+            rc = 1
+        if _installed() != before:
+            print(f"{STATUS_PREFIX} {rc} restart", flush=True)
+            return
+        print(f"{STATUS_PREFIX} {rc}", flush=True)
+
+
+if __name__ == "__main__":
+    if "--serve" in sys.argv:
+        _serve()
+    else:
+        print(__doc__)
@@ -12,14 +12,161 @@ Usage:
         fix = s.followup("That has a bug, fix it")
 """
 
-import re
 import time
 from pathlib import Path
 
 from playwright.sync_api import sync_playwright
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
 
 from core import chatgpt_selectors as S
 
+# One-shot snapshot for the Python fallback poll: stop button visible,
+# complete indicator visible, and the last assistant message's text length.
+_RESPONSE_STATE_JS = """
+(a) => {
+    const vis = (el) => {
+        const r = el.getBoundingClientRect();
+        return r.width > 0 && r.height > 0
+            && getComputedStyle(el).visibility !== 'hidden';
+    };
+    const anyVisible = (sel) =>
+        Array.from(document.querySelectorAll(sel)).some(vis);
+    let last = null;
+    for (const sel of a.assistant) {
+        const els = document.querySelectorAll(sel);
+        if (els.length) { last = els[els.length - 1]; break; }
+    }
+    return {
+        stop: anyVisible(a.stop),
+        complete: anyVisible(a.complete),
+        len: last ? last.innerText.length : 0,
+    };
+}
+"""
+
+# Header labels ChatGPT shows above code blocks that count as a language
+# (used by _CODE_BLOCKS_JS when there's no class="language-xxx").
+KNOWN_LANGS = frozenset({
+    "python", "bash", "sh", "shell", "c", "cpp", "c++",
+    "javascript", "typescript", "rust", "java", "go",
+    "ruby", "powershell", "sql", "html", "css", "json",
+    "yaml", "makefile", "toml", "r", "matlab", "lua",
+})
+
+# Collects every code block in an assistant message in one round-trip,
+# language already resolved: <code> class, then <pre> class, then the
+# header label if it's in KNOWN_LANGS (passed in as `known`).
+# The text-node walker keeps newlines that innerText can lose in ChatGPT's
+# highlighted markup (it falls back to innerText itself if the walk comes
+# out as one long line).
+# Installed once per document as window.__vbCollectCode (init script), so
+# each extraction is a one-line call instead of re-parsing this source.
+_CODE_COLLECTOR_SRC = """
+window.__vbCollectCode = (root, known) => {
+    const KNOWN = new Set(known);
+    function walk(el) {
+        const lines = [];
+        let currentLine = '';
+        function collect(node) {
+            if (node.nodeType === Node.TEXT_NODE) {
+                const parts = node.textContent.split('\\n');
+                for (let i = 0; i < parts.length; i++) {
+                    currentLine += parts[i];
+                    if (i < parts.length - 1) {
+                        lines.push(currentLine);
+                        currentLine = '';
+                    }
+                }
+                return;
+            }
+            if (node.nodeName === 'BR') {
+                lines.push(currentLine);
+                currentLine = '';
+                return;
+            }
+            // Skip buttons and non-content elements
+            if (node.nodeName === 'BUTTON') return;
+            for (const child of node.childNodes) collect(child);
+        }
+        collect(el);
+        if (currentLine) lines.push(currentLine);
+        const result = lines.join('\\n');
+
+        // If that produced a single long line, try innerText
+        if (result.length > 80 && result.indexOf('\\n') === -1) {
+            const alt = el.innerText;
+            if (alt && alt.indexOf('\\n') !== -1) return alt;
+        }
+        return result;
+    }
+
+    const out = [];
+    for (const pre of root.querySelectorAll('pre')) {
+        const code = pre.querySelector('code');
+        if (!code) continue;
+        const text = walk(code);
+        let m = (code.className || '').match(/language-(\\w+)/)
+             || (pre.className || '').match(/language-(\\w+)/);
+        let lang = m ? m[1].toLowerCase() : '';
+        if (!lang) {
+            const header = pre.querySelector('div span');
+            const t = header ? header.innerText.trim().toLowerCase() : '';
+            if (KNOWN.has(t)) lang = t;
+        }
+        out.push({language: lang || 'python', code: text});
+    }
+    return out;
+};
+"""
+
+_CODE_BLOCKS_JS = """
+(el, known) => window.__vbCollectCode ? window.__vbCollectCode(el, known) : null
+"""
+
+# In-page completion check for _wait_for_response. Runs inside the browser
+# via wait_for_function, so there is no Python round-trip per tick. State
+# (including a MutationObserver for the stability fallback) lives on
+# window.__vb and is reset whenever a new wait starts (new token).
+# Returns a truthy reason string when done, false otherwise.
+_RESPONSE_DONE_JS = """
+(a) => {
+    const vis = (el) => {
+        if (!el) return false;
+        const r = el.getBoundingClientRect();
+        return r.width > 0 && r.height > 0
+            && getComputedStyle(el).visibility !== 'hidden';
+    };
+    const anyVisible = (sel) =>
+        Array.from(document.querySelectorAll(sel)).some(vis);
+
+    let st = window.__vb;
+    if (!st || st.token !== a.token) {
+        if (st && st.observer) st.observer.disconnect();
+        st = window.__vb = {token: a.token, lastMut: performance.now()};
+        // Record the time of the last DOM change in the conversation
+        // instead of re-reading the message text every tick
+        st.observer = new MutationObserver(() => { st.lastMut = performance.now(); });
+        st.observer.observe(document.querySelector('main') || document.body,
+                            {subtree: true, childList: true, characterData: true});
+    }
+    const now = performance.now();
+
+    if (anyVisible(a.stop)) { st.lastMut = now; return false; }
+    if (anyVisible(a.complete)) { st.observer.disconnect(); return 'complete'; }
+
+    // Neither indicator visible: fall back to "DOM stopped changing"
+    if (now - st.lastMut < a.stableMs) return false;
+    let last = null;
+    for (const sel of a.assistant) {
+        const els = document.querySelectorAll(sel);
+        if (els.length) { last = els[els.length - 1]; break; }
+    }
+    if (!last || last.textContent.length <= 50) return false;
+    st.observer.disconnect();
+    return 'stable';
+}
+"""
+
 PROFILE_DIR = Path(__file__).resolve().parent.parent / ".browser_profile"
 
 
@@ -33,7 +180,7 @@ class ChatGPTSession:
                      agents, pass a unique directory per agent -- each
                      Chromium instance needs its own user_data_dir.
         model: Which ChatGPT model to use. Options: 'instant' (default),
-               'thinking', 'auto'. See selectors.py MODELS dict.
+               'thinking', 'auto'. See chatgpt_selectors.py MODELS dict.
     """
 
     def __init__(self, headed: bool = True, profile_dir: Path = None,
@@ -44,6 +191,7 @@ class ChatGPTSession:
         self._pw = None
         self._ctx = None
         self._page = None
+        self._textarea = None
         self._in_conversation = False
         self._last_response_complete = True
 
@@ -56,11 +204,16 @@ class ChatGPTSession:
             viewport={"width": 1280, "height": 900},
             args=["--disable-blink-features=AutomationControlled"],
         )
+        self._ctx.add_init_script(script=_CODE_COLLECTOR_SRC)
         # Reuse existing tab to avoid double-tab issue
         if self._ctx.pages:
             self._page = self._ctx.pages[0]
         else:
             self._page = self._ctx.new_page()
+        self._install_request_blocking()
+        # Locators re-resolve on every use, so one survives navigations
+        # and DOM reshuffles (unlike an ElementHandle).
+        self._textarea = self._page.locator(S.PROMPT_TEXTAREA).first
         self._navigate_to_new_chat()
         return self
 
@@ -120,7 +273,7 @@ class ChatGPTSession:
 
     def new_chat(self):
         """Start a brand new conversation."""
-        self._navigate_to_new_chat()
+        self._navigate_to_new_chat(soft=True)
         self._in_conversation = False
         print("[OK] New chat started.")
 
@@ -131,8 +284,13 @@ class ChatGPTSession:
         trying to use the DOM model picker.
 
         Args:
-            model_key: Model name from selectors.MODELS ('instant', 'thinking', 'auto').
+            model_key: Model name from chatgpt_selectors.MODELS ('instant', 'thinking', 'auto').
+
+        A no-op if model_key is already selected: the next prompt() starts
+        a fresh chat anyway, so the page load would buy nothing.
         """
+        if model_key == self._model:
+            return
         old_model = self._model
         self._model = model_key
         self._navigate_to_new_chat()
@@ -164,22 +322,17 @@ class ChatGPTSession:
         page = self._page
 
         # Find the hidden file input
-        file_input = None
-        for sel in S.FILE_INPUT_SELECTORS:
-            try:
-                fi = page.query_selector(sel)
-                if fi:
-                    file_input = fi
-                    break
-            except Exception:
-                continue
+        try:
+            file_input = page.query_selector(S.FILE_INPUT_SELECTOR)
+        except Exception:
+            file_input = None
 
         if not file_input:
             # Some ChatGPT layouts hide the input more deeply.
             # Try waiting briefly for it.
             try:
                 file_input = page.wait_for_selector(
-                    S.FILE_INPUT_SELECTORS[0],
+                    S.FILE_INPUT_SELECTOR,
                     timeout=5000,
                     state="attached",  # doesn't need to be visible
                 )
@@ -199,14 +352,12 @@ class ChatGPTSession:
         upload_confirmed = False
         deadline = time.time() + S.FILE_UPLOAD_TIMEOUT
         while time.time() < deadline:
-            for sel in S.FILE_UPLOAD_COMPLETE_SELECTORS:
-                try:
-                    indicator = page.query_selector(sel)
-                    if indicator and indicator.is_visible():
-                        upload_confirmed = True
-                        break
-                except Exception:
-                    continue
+            try:
+                upload_confirmed = any(
+                    el.is_visible()
+                    for el in page.query_selector_all(S.FILE_UPLOAD_COMPLETE_SELECTOR))
+            except Exception:
+                pass
             if upload_confirmed:
                 break
             time.sleep(0.5)
@@ -218,10 +369,37 @@ class ChatGPTSession:
             print(f"  [WARN] Could not confirm file upload completed (proceeding anyway)")
             time.sleep(2)
 
-    def _navigate_to_new_chat(self):
-        url = S.model_url(self._model)
-        self._page.goto(url, wait_until="domcontentloaded",
-                        timeout=S.NAVIGATION_TIMEOUT * 1000)
+    def _install_request_blocking(self):
+        """Block fonts, media, trackers (and images when headless).
+
+        Uses CDP URL blocking rather than a Playwright route: a route sends
+        every request through Python and disables the browser's HTTP cache.
+        """
+        exts = S.BLOCKED_EXTENSIONS
+        if not self._headed:
+            exts += S.BLOCKED_EXTENSIONS_HEADLESS
+        urls = [p for ext in exts for p in (f"*.{ext}", f"*.{ext}?*")]
+        urls += [p for host in S.BLOCKED_HOSTS
+                 for p in (f"*://{host}/*", f"*://*.{host}/*")]
+        try:
+            cdp = self._ctx.new_cdp_session(self._page)
+            cdp.send("Network.enable")
+            cdp.send("Network.setBlockedURLs", {"urls": urls})
+        except Exception as e:
+            print(f"  [WARN] Request blocking not installed: {e}")
+
+    def _navigate_to_new_chat(self, soft: bool = False):
+        """Open a fresh conversation with the current model.
+
+        soft=True first tries the sidebar "New chat" button, a client-side
+        route change that skips reloading the whole app. Falls back to a
+        full goto() of the model URL (always used on first load and model
+        switches, where the URL's model param matters).
+        """
+        if not (soft and self._click_new_chat()):
+            url = S.model_url(self._model)
+            self._page.goto(url, wait_until="domcontentloaded",
+                            timeout=S.NAVIGATION_TIMEOUT * 1000)
 
         # ChatGPT may show different page states after navigation:
         #   1. Direct new-chat page with #prompt-textarea visible
@@ -238,6 +416,22 @@ class ChatGPTSession:
 
         print(f"[OK] ChatGPT loaded (model={self._model}), ready for prompt.")
 
+    def _click_new_chat(self) -> bool:
+        """Click the in-app "New chat" button. True if the chat was reset."""
+        page = self._page
+        try:
+            for btn in page.query_selector_all(S.NEW_CHAT_BUTTON_SELECTOR):
+                if btn.is_visible():
+                    btn.click()
+                    # A new chat has no assistant messages yet
+                    page.wait_for_function(
+                        "(sel) => !document.querySelector(sel)",
+                        arg=S.ASSISTANT_MESSAGE_SELECTOR, timeout=5000)
+                    return True
+        except Exception:
+            pass
+        return False
+
     def _wait_for_chat_ready(self, timeout: int = None):
         """Wait for ChatGPT to be ready for input.
 
@@ -407,29 +601,19 @@ class ChatGPTSession:
     def _send_and_wait(self, text: str) -> str:
         page = self._page
 
-        # Focus and type into textarea.
+        # Focus and fill the textarea.
         # After file uploads, the DOM may have reshuffled, making old
-        # ElementHandles stale. Use page.locator() which always re-queries,
-        # and retry if the element detaches mid-interaction.
+        # ElementHandles stale. The cached locator always re-queries;
+        # retry if the element detaches mid-interaction.
+        textarea = self._textarea
         max_focus_attempts = 3
         for attempt in range(max_focus_attempts):
             try:
-                # Use locator (auto-retries) instead of ElementHandle
-                textarea = page.locator(S.PROMPT_TEXTAREA)
                 textarea.wait_for(state="visible", timeout=10_000)
                 textarea.click()
-                time.sleep(0.3)
-
-                # Clear any existing text
-                page.keyboard.press("Control+a")
-                page.keyboard.press("Backspace")
-                time.sleep(0.2)
-
-                # Type (fast fill for long prompts)
-                if len(text) > 500:
-                    textarea.fill(text)
-                else:
-                    textarea.type(text, delay=S.TYPING_DELAY_MS)
+                # fill() replaces any existing text in one call -- no
+                # select-all/backspace and no per-keystroke typing
+                textarea.fill(text)
                 break  # success
             except Exception as e:
                 if attempt < max_focus_attempts - 1:
@@ -438,9 +622,16 @@ class ChatGPTSession:
                 else:
                     raise
 
-        time.sleep(0.2)
+        # Assistant messages before sending: a new one appearing means our
+        # reply has started (or already finished) even if we never see Stop
+        try:
+            msgs_before = page.evaluate(
+                "(sel) => document.querySelectorAll(sel).length",
+                S.ASSISTANT_MESSAGE_SELECTOR)
+        except Exception:
+            msgs_before = None
 
-        # Send
+        # Send (_find_send_button waits for the button to become enabled)
         send_btn = self._find_send_button()
         if send_btn:
             send_btn.click()
@@ -449,7 +640,22 @@ class ChatGPTSession:
             print("[WARN] Send button not found, pressing Enter")
             page.keyboard.press("Enter")
 
-        time.sleep(1)  # Brief settle before polling (override POST_SEND_DELAY)
+        # Wait for generation to actually start instead of a fixed settle
+        # sleep: Stop button visible OR a new assistant message. A short
+        # answer can finish before Stop is ever seen; the message count
+        # catches that without sitting out the full timeout.
+        try:
+            if msgs_before is None:
+                page.wait_for_selector(S.STOP_GENERATING_SELECTOR, timeout=1000)
+            else:
+                page.wait_for_function(
+                    """([stop, msg, before]) => !!document.querySelector(stop)
+                        || document.querySelectorAll(msg).length > before""",
+                    arg=[S.STOP_GENERATING_SELECTOR, S.ASSISTANT_MESSAGE_SELECTOR,
+                         msgs_before],
+                    timeout=5000)
+        except Exception:
+            pass
         completed = self._wait_for_response()
 
         response = self._extract_last_response()
@@ -460,72 +666,127 @@ class ChatGPTSession:
     def _find_send_button(self):
         """Find the send button, with a brief retry for DOM settling."""
         for wait in range(5):  # up to 1.5 seconds
-            for sel in S.SEND_BUTTON_SELECTORS:
-                try:
-                    btn = self._page.query_selector(sel)
-                    if btn and btn.is_visible() and btn.is_enabled():
+            try:
+                for btn in self._page.query_selector_all(S.SEND_BUTTON_SELECTOR):
+                    if btn.is_visible() and btn.is_enabled():
                         return btn
-                except Exception:
-                    continue
+            except Exception:
+                pass
             time.sleep(0.3)
         # Last resort: return any visible send button even if not "enabled"
-        for sel in S.SEND_BUTTON_SELECTORS:
-            try:
-                btn = self._page.query_selector(sel)
-                if btn and btn.is_visible():
+        try:
+            for btn in self._page.query_selector_all(S.SEND_BUTTON_SELECTOR):
+                if btn.is_visible():
                     return btn
-            except Exception:
-                continue
+        except Exception:
+            pass
         return None
 
+    def _last_assistant_message(self):
+        """Return the last assistant message element, or None.
+
+        One round-trip. Keeps the priority of ASSISTANT_MESSAGE_SELECTORS:
+        the first selector with any match wins, and its last match is used
+        (a comma-joined query would mix the two in document order).
+        """
+        try:
+            handle = self._page.evaluate_handle(
+                """(sels) => {
+                    for (const sel of sels) {
+                        const els = document.querySelectorAll(sel);
+                        if (els.length) return els[els.length - 1];
+                    }
+                    return null;
+                }""",
+                S.ASSISTANT_MESSAGE_SELECTORS,
+            )
+        except Exception:
+            return None
+        return handle.as_element()
+
     def _wait_for_response(self, timeout=S.RESPONSE_TIMEOUT):
         print("[...] Waiting for response...")
+        start = time.time()
+        args = {
+            "token": str(time.time()),
+            "stop": S.STOP_GENERATING_SELECTOR,
+            "complete": S.RESPONSE_COMPLETE_SELECTOR,
+            "assistant": S.ASSISTANT_MESSAGE_SELECTORS,
+            "stableMs": 5000,
+        }
+        try:
+            handle = self._page.wait_for_function(
+                _RESPONSE_DONE_JS, arg=args, polling=500, timeout=timeout * 1000)
+        except PlaywrightTimeoutError:
+            print("[WARN] Response timeout -- may be incomplete.")
+            return False
+        except Exception as e:
+            # e.g. navigation mid-wait destroyed the context: poll from Python
+            print(f"  [WARN] In-page wait failed ({e}), polling instead")
+            return self._poll_for_response(max(timeout - (time.time() - start), 1))
+
+        if handle.json_value() == "complete":
+            print("[OK] Response complete.")
+        else:
+            print("[OK] Response appears complete (content stable).")
+        return True
+
+    def _poll_for_response(self, timeout):
+        """Python-side fallback for _wait_for_response.
+
+        Polls with an adaptive interval: 0.25s after any change, growing
+        x1.5 per quiet tick up to 2s. Short answers are caught quickly and
+        long generations don't cost a round-trip burst every second.
+        """
         deadline = time.time() + timeout
         last_text_len = 0
-        stable_count = 0
+        stable_since = None
+        prev_streaming = None
+        interval = 0.25
+
+        args = {
+            "stop": S.STOP_GENERATING_SELECTOR,
+            "complete": S.RESPONSE_COMPLETE_SELECTOR,
+            "assistant": S.ASSISTANT_MESSAGE_SELECTORS,
+        }
 
         while time.time() < deadline:
-            still_streaming = False
-            for sel in S.STOP_GENERATING_SELECTORS:
-                stop_btn = self._page.query_selector(sel)
-                if stop_btn and stop_btn.is_visible():
-                    still_streaming = True
-                    break
+            # All three checks in one round-trip
+            try:
+                state = self._page.evaluate(_RESPONSE_STATE_JS, args)
+            except Exception:
+                state = {"stop": False, "complete": False, "len": 0}
+            still_streaming = state["stop"]
+            changed = still_streaming != prev_streaming
+            prev_streaming = still_streaming
 
             if not still_streaming:
-                for sel in S.RESPONSE_COMPLETE_INDICATORS:
-                    indicator = self._page.query_selector(sel)
-                    if indicator and indicator.is_visible():
-                        print("[OK] Response complete.")
-                        return True
+                if state["complete"]:
+                    print("[OK] Response complete.")
+                    return True
 
                 # Neither streaming nor complete indicators visible.
                 # Check if content is still growing (ChatGPT may be
                 # between states -- the stop button disappeared but
                 # the regenerate button hasn't appeared yet).
-                current_len = 0
-                for sel in S.ASSISTANT_MESSAGE_SELECTORS:
-                    msgs = self._page.query_selector_all(sel)
-                    if msgs:
-                        try:
-                            current_len = len(msgs[-1].inner_text())
-                        except Exception:
-                            pass
-                        break
+                current_len = state["len"]
 
                 if current_len > 0 and current_len == last_text_len:
-                    stable_count += 1
+                    stable_since = stable_since or time.time()
                 else:
-                    stable_count = 0
+                    stable_since = None
+                    changed = True
                 last_text_len = current_len
 
                 # Only consider it done if content has been stable for 5s
                 # AND we have some content
-                if stable_count >= 5 and current_len > 50:
+                if (stable_since and time.time() - stable_since >= 5
+                        and current_len > 50):
                     print("[OK] Response appears complete (content stable).")
                     return True
 
-            time.sleep(1)
+            interval = 0.25 if changed else min(interval * 1.5, 2.0)
+            time.sleep(interval)
 
         print("[WARN] Response timeout -- may be incomplete.")
         return False
@@ -540,16 +801,20 @@ class ChatGPTSession:
 
         If DOM code extraction fails, falls back to raw inner_text().
         """
-        last = None
-        for sel in S.ASSISTANT_MESSAGE_SELECTORS:
-            messages = self._page.query_selector_all(sel)
-            if messages:
-                last = messages[-1]
-                break
+        last = self._last_assistant_message()
 
         if not last:
             return "(no response found)"
 
+        # Prose-only answers (the common case) need one round-trip: the
+        # probe returns the text directly when there's no <pre> at all.
+        try:
+            plain = last.evaluate("el => el.querySelector('pre') ? null : el.innerText")
+        except Exception:
+            plain = None
+        if plain is not None:
+            return plain.strip()
+
         # Extract structured code blocks from <pre><code> elements
         code_blocks = self._get_code_blocks_from_dom(last)
 
@@ -634,135 +899,24 @@ class ChatGPTSession:
     def _get_code_blocks_from_dom(self, message_el) -> list:
         """Extract code text (with newlines) from each <pre><code> in the message.
 
-        Returns [{language: str, code: str}] where code has proper newlines.
-        """
-        results = []
+        One evaluate() for the whole message; see _CODE_BLOCKS_JS.
 
-        pres = message_el.query_selector_all("pre")
-        for pre in pres:
-            code_el = pre.query_selector("code")
-            if not code_el:
-                continue
-
-            # --- Detect language ---
-            lang = ""
-            try:
-                cls = code_el.get_attribute("class") or ""
-                m = re.search(r"language-(\w+)", cls)
-                if m:
-                    lang = m.group(1).lower()
-            except Exception:
-                pass
-
-            if not lang:
-                try:
-                    cls = pre.get_attribute("class") or ""
-                    m = re.search(r"language-(\w+)", cls)
-                    if m:
-                        lang = m.group(1).lower()
-                except Exception:
-                    pass
-
-            if not lang:
-                try:
-                    # ChatGPT shows language label in a header span above the code
-                    header_span = pre.query_selector("div span")
-                    if header_span:
-                        t = header_span.inner_text().strip().lower()
-                        known_langs = {
-                            "python", "bash", "sh", "shell", "c", "cpp", "c++",
-                            "javascript", "typescript", "rust", "java", "go",
-                            "ruby", "powershell", "sql", "html", "css", "json",
-                            "yaml", "makefile", "toml", "r", "matlab", "lua",
-                        }
-                        if t in known_langs:
-                            lang = t
-                except Exception:
-                    pass
-
-            # --- Extract code text with newlines ---
-            code = self._get_code_text(code_el)
-
-            if code and len(code.strip()) > 5:
-                results.append({
-                    "language": lang or "python",
-                    "code": code.strip(),
-                })
-
-        return results
-
-    def _get_code_text(self, code_el) -> str:
-        """Get the text content of a <code> element with newlines preserved.
-
-        Tries multiple strategies because ChatGPT's DOM varies.
+        Returns [{language: str, code: str}] where code has proper newlines.
         """
-        # Strategy 1: JS that walks text nodes and respects line breaks
+        known = sorted(KNOWN_LANGS)
         try:
-            text = code_el.evaluate("""
-                el => {
-                    // Collect text preserving newline characters
-                    let lines = [];
-                    let currentLine = '';
-
-                    function collect(node) {
-                        if (node.nodeType === Node.TEXT_NODE) {
-                            let text = node.textContent;
-                            let parts = text.split('\\n');
-                            for (let i = 0; i < parts.length; i++) {
-                                currentLine += parts[i];
-                                if (i < parts.length - 1) {
-                                    lines.push(currentLine);
-                                    currentLine = '';
-                                }
-                            }
-                            return;
-                        }
-                        if (node.nodeName === 'BR') {
-                            lines.push(currentLine);
-                            currentLine = '';
-                            return;
-                        }
-                        // Skip buttons and non-content elements
-                        if (node.nodeName === 'BUTTON') return;
-
-                        for (const child of node.childNodes) {
-                            collect(child);
-                        }
-                    }
-
-                    collect(el);
-                    if (currentLine) lines.push(currentLine);
-
-                    let result = lines.join('\\n');
-
-                    // If that produced a single long line, try innerText
-                    if (result.length > 80 && result.indexOf('\\n') === -1) {
-                        let alt = el.innerText;
-                        if (alt && alt.indexOf('\\n') !== -1) {
-                            return alt;
-                        }
-                    }
-
-                    return result;
-                }
-            """)
-            if text and len(text.strip()) > 5:
-                return text
+            raw = message_el.evaluate(_CODE_BLOCKS_JS, known)
+            if raw is None:
+                # Document predates the init script: install it here once
+                self._page.evaluate(_CODE_COLLECTOR_SRC)
+                raw = message_el.evaluate(_CODE_BLOCKS_JS, known)
         except Exception:
-            pass
-
-        # Strategy 2: plain innerText
-        try:
-            text = code_el.inner_text()
-            if text:
-                return text
-        except Exception:
-            pass
+            return []
 
-        # Strategy 3: textContent (last resort, may lose newlines)
-        try:
-            return code_el.text_content() or ""
-        except Exception:
-            return ""
+        return [
+            {"language": item["language"], "code": item["code"].strip()}
+            for item in raw or []
+            if len((item.get("code") or "").strip()) > 5
+        ]
 
     # (_insert_fences removed — response now built directly from DOM segments)
\ No newline at end of file
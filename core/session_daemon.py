@@ -0,0 +1,267 @@
+"""
+session_daemon.py -- Keep one ChatGPT browser session alive across CLI runs.
+
+Every `python main.py "..."` normally launches Chromium, loads the profile,
+and waits for ChatGPT to boot -- seconds of startup before the first prompt
+goes out. With --daemon, the CLI instead talks to a background process that
+owns a single ChatGPTSession and keeps it open between invocations.
+
+Transport is multiprocessing.connection on 127.0.0.1 (works on Windows and
+Linux alike) with a random authkey. Port and key live in
+core/.session_daemon.json (owner-only), which the client reads to connect.
+
+The browser has one chat, so one client holds it at a time: the first call
+takes a lease that lasts until the client releases it (or goes quiet for
+LEASE_TIMEOUT); other clients wait their turn. The daemon exits on its own
+after IDLE_TIMEOUT without requests.
+
+Usage:
+    python -m core.session_daemon --serve [--headless]   # run in foreground
+    python -m core.session_daemon --stop                 # shut it down
+
+    from core.session_daemon import get_session
+    session = get_session(headed=True)   # connects, spawning if needed
+    session.prompt("write fizzbuzz")
+"""
+
+import json
+import os
+import secrets
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+STATE_FILE = Path(__file__).resolve().parent / ".session_daemon.json"
+SPAWN_TIMEOUT = 90           # seconds to wait for a new daemon to come up
+CALL_TIMEOUT = 300           # max wait for one answer (a response is <= 180s)
+BUSY_TIMEOUT = 30 * 60       # max wait for another client's run to finish
+LEASE_TIMEOUT = 10 * 60      # a client silent this long loses the chat
+IDLE_TIMEOUT = 30 * 60       # daemon exits after this long with no requests
+
+# Session methods a client may call remotely
+_ALLOWED = {"prompt", "followup", "new_chat", "switch_model"}
+
+
+# ---------------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------------
+
+class DaemonSession:
+    """Stand-in for ChatGPTSession that forwards calls to the daemon.
+
+    Exposes the subset the pipeline uses: prompt, followup, new_chat,
+    switch_model, and _last_response_complete. The first call takes the
+    daemon's conversation lease; close() hands it back.
+    """
+
+    def __init__(self, address, authkey: bytes):
+        self._address = address
+        self._authkey = authkey
+        self._token = secrets.token_hex(8)
+        self._last_response_complete = True
+
+    def _call(self, method: str, *args, **kwargs):
+        deadline = time.time() + BUSY_TIMEOUT
+        waiting = False
+        while True:
+            with Client(self._address, authkey=self._authkey) as conn:
+                conn.send((method, args, kwargs, self._token))
+                if not conn.poll(CALL_TIMEOUT):
+                    raise RuntimeError(f"session daemon: no answer to {method} "
+                                       f"within {CALL_TIMEOUT}s")
+                status, result, complete = conn.recv()
+            if status != "busy":
+                break
+            if time.time() > deadline:
+                raise RuntimeError(f"session daemon: still busy after {BUSY_TIMEOUT}s")
+            if not waiting:
+                print("[...] Session daemon is busy with another run, waiting...")
+                waiting = True
+            time.sleep(1)
+        self._last_response_complete = complete
+        if status != "ok":
+            raise RuntimeError(f"session daemon: {result}")
+        return result
+
+    def close(self):
+        """Release the conversation lease so other clients can use the chat."""
+        try:
+            self._call("release")
+        except Exception:
+            pass
+
+    def prompt(self, text: str, files: list = None) -> str:
+        return self._call("prompt", text, files=files)
+
+    def followup(self, text: str, files: list = None) -> str:
+        return self._call("followup", text, files=files)
+
+    def new_chat(self):
+        return self._call("new_chat")
+
+    def switch_model(self, model_key: str):
+        return self._call("switch_model", model_key)
+
+
+def connect():
+    """Return a DaemonSession for a running daemon, or None."""
+    try:
+        state = json.loads(STATE_FILE.read_text(encoding="utf-8"))
+        address = ("127.0.0.1", state["port"])
+        authkey = bytes.fromhex(state["authkey"])
+        with Client(address, authkey=authkey) as conn:
+            conn.send(("ping", (), {}, None))
+            if not conn.poll(CALL_TIMEOUT):
+                return None
+            conn.recv()
+    except Exception:
+        return None
+    return DaemonSession(address, authkey)
+
+
+def get_session(headed: bool = True, model: str = None):
+    """Connect to the daemon, spawning it in the background if needed."""
+    session = connect()
+    if session:
+        print("[OK] Using running session daemon.")
+        return session
+
+    print("[...] Starting session daemon (first run launches the browser)...")
+    cmd = [sys.executable, "-m", "core.session_daemon", "--serve"]
+    if not headed:
+        cmd.append("--headless")
+    if model:
+        cmd += ["--model", model]
+    kwargs = {"cwd": str(ROOT), "stdin": subprocess.DEVNULL,
+              "stdout": subprocess.DEVNULL, "stderr": subprocess.DEVNULL}
+    if os.name == "nt":
+        kwargs["creationflags"] = (subprocess.DETACHED_PROCESS
+                                   | subprocess.CREATE_NEW_PROCESS_GROUP)
+    else:
+        kwargs["start_new_session"] = True
+    subprocess.Popen(cmd, **kwargs)
+
+    deadline = time.time() + SPAWN_TIMEOUT
+    while time.time() < deadline:
+        time.sleep(1)
+        session = connect()
+        if session:
+            print("[OK] Session daemon ready.")
+            return session
+    raise RuntimeError(f"session daemon did not start within {SPAWN_TIMEOUT}s")
+
+
+def stop():
+    """Ask a running daemon to exit. Returns True if one was stopped."""
+    session = connect()
+    if not session:
+        return False
+    try:
+        session._call("shutdown")
+    except Exception:
+        pass
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Daemon
+# ---------------------------------------------------------------------------
+
+def _write_state(state: dict):
+    """Write the state file readable by the owner only (it holds the key)."""
+    try:
+        STATE_FILE.unlink()   # O_CREAT's mode only applies to a new file
+    except OSError:
+        pass
+    fd = os.open(STATE_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+
+
+def serve(headed: bool = True, model: str = None):
+    """Own one ChatGPTSession and answer requests until told to stop."""
+    from core.session import ChatGPTSession
+
+    authkey = secrets.token_bytes(32)
+    with Listener(("127.0.0.1", 0), authkey=authkey) as listener, \
+            ChatGPTSession(headed=headed, model=model) as sess:
+        _write_state({
+            "pid": os.getpid(),
+            "port": listener.address[1],
+            "authkey": authkey.hex(),
+        })
+        print(f"[OK] Session daemon listening on {listener.address}")
+
+        last_request = [time.time()]
+        owner, lease_until = None, 0.0
+
+        def _idle_watch():
+            # accept() can't time out, so stop the loop the way --stop does
+            while time.time() - last_request[0] < IDLE_TIMEOUT:
+                time.sleep(30)
+            try:
+                with Client(listener.address, authkey=authkey) as conn:
+                    conn.send(("shutdown", (), {}, None))
+            except Exception:
+                pass
+
+        threading.Thread(target=_idle_watch, daemon=True).start()
+
+        try:
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception:
+                    continue  # bad authkey / dropped client
+                with conn:
+                    try:
+                        method, args, kwargs, token = conn.recv()
+                    except (EOFError, ValueError):
+                        continue
+                    if method == "shutdown":
+                        conn.send(("ok", None, True))
+                        break
+                    if method == "ping":
+                        conn.send(("ok", None, True))
+                        continue
+                    last_request[0] = time.time()
+                    if method == "release":
+                        if owner == token:
+                            owner = None
+                        conn.send(("ok", None, True))
+                        continue
+                    if method not in _ALLOWED:
+                        conn.send(("err", f"unknown method {method!r}", True))
+                        continue
+                    if owner not in (None, token) and time.time() < lease_until:
+                        conn.send(("busy", None, True))
+                        continue
+                    owner = token
+                    try:
+                        result = getattr(sess, method)(*args, **kwargs)
+                        conn.send(("ok", result, sess._last_response_complete))
+                    except Exception as e:
+                        conn.send(("err", str(e), sess._last_response_complete))
+                    last_request[0] = time.time()
+                    lease_until = last_request[0] + LEASE_TIMEOUT
+        finally:
+            try:
+                STATE_FILE.unlink()
+            except OSError:
+                pass
+
+
+if __name__ == "__main__":
+    if "--stop" in sys.argv:
+        print("[OK] Daemon stopped." if stop() else "[INFO] No daemon running.")
+    elif "--serve" in sys.argv:
+        _model = None
+        if "--model" in sys.argv:
+            _model = sys.argv[sys.argv.index("--model") + 1]
+        serve(headed="--headless" not in sys.argv, model=_model)
+    else:
+        print(__doc__)
@@ -91,8 +91,13 @@ def _step(number: str, title: str):
 
 
 def _install_packages():
+    import importlib.util
     packages = ["playwright", "paramiko"]
     for pkg in packages:
+        # In-process check first: no pip run on machines that already have it
+        if importlib.util.find_spec(pkg) is not None:
+            print(f"  [OK] {pkg} already installed")
+            continue
         print(f"  Installing {pkg}...")
         result = subprocess.run(
             [sys.executable, "-m", "pip", "install", pkg],
@@ -114,7 +119,24 @@ def _install_packages():
                 print(f"  Error: {result.stderr[:200]}")
 
 
+def _chromium_installed() -> bool:
+    """True if the Chromium build this Playwright version expects is present.
+
+    Checks the exact executable_path rather than any chromium-* folder, so
+    a stale revision left by an older Playwright still triggers an install.
+    """
+    try:
+        from playwright.sync_api import sync_playwright
+        with sync_playwright() as pw:
+            return Path(pw.chromium.executable_path).exists()
+    except Exception:
+        return False
+
+
 def _install_chromium():
+    if _chromium_installed():
+        print("  [OK] Chromium already installed")
+        return
     print("  Installing Chromium via Playwright...")
     print("  (This may take a minute on first install)")
     result = subprocess.run(
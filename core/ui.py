@@ -63,6 +63,14 @@ RAW_MD_DIR = ROOT / "raw_md"
 CONTEXT_DIR = ROOT / "context"
 UPLOADS_DIR = ROOT / "uploads"
 
+_PROMPT_LINE_RE = re.compile(r"\*\*Prompt\*\*:\s*(.+)")   # raw_md header line
+_BAD_FNAME_RE = re.compile(r'[\\/:*?"<>|]+')           # invalid in Windows filenames
+
+# Uploads with these suffixes get a text preview injected into the prompt
+TEXT_EXTS = frozenset({".txt", ".csv", ".json", ".py", ".md", ".yaml", ".yml",
+                       ".toml", ".ini", ".cfg", ".log", ".tsv", ".xml", ".html",
+                       ".css", ".js", ".c", ".cpp", ".h", ".sh", ".sql", ".r"})
+
 sys.path.insert(0, str(ROOT))
 
 # Force UTF-8 for all I/O on Windows (prevents 'charmap' codec errors
@@ -179,22 +187,41 @@ def api_status():
 
 @app.route("/api/history")
 def api_history():
-    runs = []
-    if RAW_MD_DIR.exists():
-        for f in sorted(RAW_MD_DIR.iterdir(), key=lambda p: p.stat().st_mtime, reverse=True):
-            if f.suffix == ".md":
+    if not RAW_MD_DIR.exists():
+        return jsonify([])
+    # Stat once, sort, and keep the newest 50 BEFORE opening anything
+    entries = []
+    with os.scandir(RAW_MD_DIR) as it:
+        for e in it:
+            if e.name.endswith(".md") and e.is_file():
                 try:
-                    content = f.read_text(encoding="utf-8", errors="replace")
-                    prompt_match = re.search(r"\*\*Prompt\*\*:\s*(.+)", content)
-                    prompt = prompt_match.group(1) if prompt_match else f.stem
-                    runs.append({
-                        "filename": f.name,
-                        "prompt": prompt[:120],
-                        "date": datetime.fromtimestamp(f.stat().st_mtime).strftime("%Y-%m-%d %H:%M"),
-                    })
-                except Exception:
+                    entries.append((e.stat().st_mtime, e.path))
+                except OSError:
                     pass
-    return jsonify(runs[:50])
+    entries.sort(reverse=True)
+    entries = entries[:50]
+
+    def _summary(item):
+        mtime, path = item
+        try:
+            # The **Prompt** line is in the file header; logs can be MBs
+            with open(path, encoding="utf-8", errors="replace") as fh:
+                head = fh.read(4096)
+        except OSError:
+            return None
+        name = os.path.basename(path)
+        prompt_match = _PROMPT_LINE_RE.search(head)
+        prompt = prompt_match.group(1) if prompt_match else os.path.splitext(name)[0]
+        return {
+            "filename": name,
+            "prompt": prompt[:120],
+            "date": datetime.fromtimestamp(mtime).strftime("%Y-%m-%d %H:%M"),
+        }
+
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        runs = [r for r in pool.map(_summary, entries) if r]
+    return jsonify(runs)
 
 @app.route("/api/programs")
 def api_programs():
@@ -254,20 +281,21 @@ def api_file(subdir, filename):
 @app.route("/api/clear/<path:folder>", methods=["POST"])
 def api_clear(folder):
     """Clear all files in a folder (history, programs, outputs, or uploads)."""
-    import shutil as _shutil
     dir_map = {"history": RAW_MD_DIR, "programs": PROGRAMS_DIR,
                "outputs": OUTPUTS_DIR, "uploads": UPLOADS_DIR}
     target = dir_map.get(folder)
     if not target or not target.exists():
         return jsonify({"error": "Invalid folder"}), 400
     count = 0
-    for f in target.iterdir():
-        if f.is_file():
-            try:
-                f.unlink()
-                count += 1
-            except Exception:
-                pass
+    # One readdir; DirEntry carries the file type so no per-file stat/Path
+    with os.scandir(target) as it:
+        for entry in it:
+            if entry.is_file(follow_symlinks=False):
+                try:
+                    os.unlink(entry.path)
+                    count += 1
+                except OSError:
+                    pass
     return jsonify({"cleared": count})
 
 @app.route("/api/agent_files/<agent_id>/<folder>")
@@ -297,7 +325,7 @@ def api_agent_files(agent_id, folder):
             if folder == "history":
                 try:
                     content = f.read_text(encoding="utf-8", errors="replace")
-                    prompt_match = re.search(r"\*\*Prompt\*\*:\s*(.+)", content)
+                    prompt_match = _PROMPT_LINE_RE.search(content)
                     prompt_str = prompt_match.group(1) if prompt_match else f.stem
                     files.append({
                         "filename": f.name,
@@ -318,7 +346,7 @@ def api_agent_files(agent_id, folder):
                 if f.is_file() and f.suffix == '.md' and f.stat().st_mtime >= start_time:
                     try:
                         content = f.read_text(encoding="utf-8", errors="replace")
-                        prompt_match = re.search(r"\*\*Prompt\*\*:\s*(.+)", content)
+                        prompt_match = _PROMPT_LINE_RE.search(content)
                         prompt_str = prompt_match.group(1) if prompt_match else f.stem
                         files.append({
                             "filename": f.name,
@@ -330,7 +358,7 @@ def api_agent_files(agent_id, folder):
         elif md_path and md_path.exists():
             try:
                 content = md_path.read_text(encoding="utf-8", errors="replace")
-                prompt_match = re.search(r"\*\*Prompt\*\*:\s*(.+)", content)
+                prompt_match = _PROMPT_LINE_RE.search(content)
                 prompt_str = prompt_match.group(1) if prompt_match else md_path.stem
                 files.append({
                     "filename": md_path.name,
@@ -400,15 +428,12 @@ def api_upload():
     for key in request.files:
         f = request.files[key]
         if f.filename:
-            safe = re.sub(r'[\\/:*?"<>|]+', '_', f.filename)
+            safe = _BAD_FNAME_RE.sub("_", f.filename)
             dest = UPLOADS_DIR / safe
             f.save(str(dest))
             uploaded.append(safe)
             file_paths.append(str(dest.resolve()))
-            text_exts = {".txt",".csv",".json",".py",".md",".yaml",".yml",
-                         ".toml",".ini",".cfg",".log",".tsv",".xml",".html",
-                         ".css",".js",".c",".cpp",".h",".sh",".sql",".r"}
-            if dest.suffix.lower() in text_exts:
+            if dest.suffix.lower() in TEXT_EXTS:
                 try:
                     c = dest.read_text(encoding="utf-8", errors="replace")
                     previews[safe] = c[:5000] + ("\n...(truncated)" if len(c) > 5000 else "")
@@ -628,11 +653,10 @@ def on_run_agent(data):
 
             # Recover the raw_md path from the pipeline's log directory
             try:
-                _raw_md_dir = Path(__file__).resolve().parent.parent / "raw_md"
-                if _raw_md_dir.exists():
-                    md_files = sorted(_raw_md_dir.glob("*.md"), key=lambda p: p.stat().st_mtime, reverse=True)
-                    if md_files:
-                        md_path = md_files[0]  # most recent log
+                md_files = list(RAW_MD_DIR.glob("*.md"))
+                if md_files:
+                    # most recent log -- one max() pass, no full sort
+                    md_path = max(md_files, key=lambda p: p.stat().st_mtime)
             except Exception:
                 pass
 
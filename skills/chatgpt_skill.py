@@ -5,39 +5,47 @@ Thin wrapper that re-exports ChatGPTSession and provides
 raw_md saving / login mode.
 
 For the actual browser logic, see core/session.py.
-For DOM selectors, see core/selectors.py.
+For DOM selectors, see core/chatgpt_selectors.py.
 
 Usage:
     python -m skills.chatgpt_skill --login    # First-time manual login
 """
 
-import argparse
 import re
 from datetime import datetime
 from pathlib import Path
 
-from playwright.sync_api import sync_playwright
-
 from core import chatgpt_selectors as S
-from core.session import ChatGPTSession  # noqa: re-export
 
 PROFILE_DIR = Path(__file__).resolve().parent.parent / ".browser_profile"
 RAW_MD_DIR = Path(__file__).resolve().parent.parent / "raw_md"
+# Characters that are invalid in Windows filenames
+_BAD_FNAME_RE = re.compile(r'[\\/:*?"<>|]+')
+
+
+def __getattr__(name):
+    # Re-export ChatGPTSession without importing Playwright up front:
+    # save_response / append_to_log callers never need a browser.
+    if name == "ChatGPTSession":
+        from core.session import ChatGPTSession
+        return ChatGPTSession
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def save_response(prompt: str, response: str, prompt_num: int = None) -> Path:
     """Save a prompt/response pair as timestamped markdown."""
     RAW_MD_DIR.mkdir(exist_ok=True)
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    now = datetime.now()
+    ts = now.strftime("%Y%m%d_%H%M%S")
     # Sanitize: replace any character that's invalid in Windows filenames
-    slug = re.sub(r'[\\/:*?"<>|]+', '_', prompt[:40]).replace(" ", "_")
+    slug = _BAD_FNAME_RE.sub("_", prompt[:40]).replace(" ", "_")
     filename = f"{ts}_{slug}.md"
     filepath = RAW_MD_DIR / filename
 
     label = f" (Prompt {prompt_num})" if prompt_num else ""
     content = (
         f"# LLM Response{label}\n"
-        f"**Timestamp**: {datetime.now().isoformat()}\n"
+        f"**Timestamp**: {now.isoformat()}\n"
         f"**Prompt**: {prompt}\n\n---\n\n"
         f"## Response\n\n{response}\n"
     )
@@ -57,6 +65,7 @@ def append_to_log(filepath: Path, section_title: str, content: str):
 
 def run_login_mode():
     """Open browser for manual login. Cookies persist."""
+    from playwright.sync_api import sync_playwright
     print("=" * 50)
     print("LOGIN MODE -- Log into ChatGPT, then close the browser.")
     print("=" * 50)
@@ -79,6 +88,7 @@ def run_login_mode():
 
 
 def main():
+    import argparse
     parser = argparse.ArgumentParser(description="ChatGPT Browser Skill")
     parser.add_argument("--login", action="store_true", help="Open browser for manual login")
     args = parser.parse_args()
@@ -11,13 +11,24 @@ That's it. No scoring, no heuristics, no longest-run detection.
 """
 
 import re
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from itertools import islice
 from typing import List, Optional, Tuple
 
 # ---------------------------------------------------------------------------
 # Data
 # ---------------------------------------------------------------------------
 
+LANG_EXTENSIONS = {
+    "python": ".py", "py": ".py",
+    "bash": ".sh", "sh": ".sh", "shell": ".sh",
+    "c": ".c", "cpp": ".cpp", "c++": ".cpp",
+    "rust": ".rs", "java": ".java",
+    "javascript": ".js", "js": ".js",
+    "typescript": ".ts", "ts": ".ts",
+}
+
+
 @dataclass
 class CodeBlock:
     language: str
@@ -26,27 +37,27 @@ class CodeBlock:
 
     @property
     def extension(self) -> str:
-        ext_map = {
-            "python": ".py", "py": ".py",
-            "bash": ".sh", "sh": ".sh", "shell": ".sh",
-            "c": ".c", "cpp": ".cpp", "c++": ".cpp",
-            "rust": ".rs", "java": ".java",
-            "javascript": ".js", "js": ".js",
-            "typescript": ".ts", "ts": ".ts",
-        }
-        return ext_map.get(self.language, ".py")
+        return LANG_EXTENSIONS.get(self.language, ".py")
 
 
 # ---------------------------------------------------------------------------
 # Regex for fenced code blocks
 # ---------------------------------------------------------------------------
 
-FENCED_BLOCK_RE = re.compile(
-    r"```(\w*)\s*\n"
+# Optional: google-re2 gives linear-time matching, so a long response with
+# many (or unterminated) fences can't make the lazy .*? backtrack. The
+# pattern sticks to the RE2 subset and sets DOTALL inline, since re2's
+# compile() doesn't take re-style flags.
+try:
+    import re2 as _fence_re
+except ImportError:
+    _fence_re = re
+
+FENCED_BLOCK_RE = _fence_re.compile(
+    r"(?s)```(\w*)\s*\n"
     r"(?:Copy\s*code\s*\n)?"
     r"(.*?)"
-    r"\n```",
-    re.DOTALL,
+    r"\n```"
 )
 
 # Language labels that ChatGPT's UI leaks into the text
@@ -169,12 +180,9 @@ def _try_unfenced(text: str) -> List[CodeBlock]:
         if stripped.lower() in ("copy code", "copy"):
             continue
 
-        # Check for code start markers
-        for marker in CODE_START_MARKERS:
-            if stripped.startswith(marker):
-                code_start = i
-                break
-        if code_start is not None:
+        # Check for code start markers (tuple startswith: one C-level scan)
+        if stripped.startswith(CODE_START_MARKERS):
+            code_start = i
             break
 
     if code_start is None:
@@ -242,19 +250,20 @@ def _strip_leading_label(code: str, detected_lang: str) -> str:
     if not code:
         return code
 
-    first_line = code.split("\n")[0].strip()
+    first_line, _, remainder = code.partition("\n")
+    first_line = first_line.strip()
+    first_lower = first_line.lower()
 
     # Label on its own line
-    if first_line.lower() in KNOWN_LANG_LABELS:
-        return "\n".join(code.split("\n")[1:])
+    if first_lower in KNOWN_LANG_LABELS:
+        return remainder
 
     # Label glued to first token: "Pythonimport math" -> "import math"
     for label in KNOWN_LANG_LABELS:
-        if first_line.lower().startswith(label) and len(first_line) > len(label):
+        if first_lower.startswith(label) and len(first_line) > len(label):
             rest = first_line[len(label):]
             if rest[0] not in (" ", "\n"):  # glued
-                remaining_lines = code.split("\n")[1:]
-                return rest + "\n" + "\n".join(remaining_lines)
+                return rest + "\n" + remainder
 
     return code
 
@@ -271,9 +280,9 @@ def _strip_copy_code(code: str) -> str:
 def _strip_trailing_prose_from_code(code: str, lang: str) -> str:
     """Strip trailing prose and foreign-language blocks from extracted code.
 
-    When session.py's _insert_fences fails to reconstruct small bat/shell
-    code blocks at the end of a ChatGPT response, they get glued onto the
-    main code block along with prose like "Run it from your folder:".
+    When a response reaches us as flat text (no DOM code blocks), small
+    bat/shell blocks at the end can get glued onto the main code block
+    along with prose like "Run it from your folder:".
 
     Strategy: find the last line that is a definitive code construct for the
     language (like `if __name__` for Python, `return 0;` for C, etc.) and
@@ -392,6 +401,11 @@ def _find_python_code_end(lines: list) -> Optional[int]:
     return end
 
 
+# Any of ( ) { } [ ] = ; // /* */ -> :: && || anywhere marks a line as code
+# (=>, !=, ==, <=, >= all contain "="). One scan instead of one per token.
+_CODE_CHARS_RE = re.compile(r"[(){}\[\]=;]|//|/\*|\*/|->|::|&&|\|\|")
+
+
 def _looks_like_code(line: str, lang: str) -> bool:
     """Return True if line looks like it could be code in the given language."""
     s = line.strip()
@@ -399,9 +413,7 @@ def _looks_like_code(line: str, lang: str) -> bool:
         return False
 
     # Universal code indicators
-    code_chars = ("(", ")", "{", "}", "[", "]", "=", ";", "//", "/*", "*/",
-                  "->", "=>", "::", "&&", "||", "!=", "==", "<=", ">=")
-    if any(c in s for c in code_chars):
+    if _CODE_CHARS_RE.search(s):
         return True
 
     # Python-specific
@@ -410,7 +422,7 @@ def _looks_like_code(line: str, lang: str) -> bool:
                       "if ", "elif ", "else:", "for ", "while ", "with ",
                       "try:", "except", "finally:", "raise ", "yield ",
                       "print(", "self.", "assert ", "@", "#")
-        if any(s.startswith(m) for m in py_markers):
+        if s.startswith(py_markers):
             return True
         # Indented lines are almost always code
         if line.startswith(" ") or line.startswith("\t"):
@@ -423,7 +435,7 @@ def _looks_like_code(line: str, lang: str) -> bool:
                         "for ", "do", "done", "while ", "case ", "esac",
                         "function ", "local ", "readonly ", "set ",
                         "trap ", "exit ", "return ", "#!", "#")
-        if any(s.startswith(m) for m in bash_markers):
+        if s.startswith(bash_markers):
             return True
         # Variable assignments: FOO=bar or foo="bar"
         if "=" in s and not s.startswith(("Here", "This", "The", "It")):
@@ -445,7 +457,7 @@ def _is_shell_command_line(line: str) -> bool:
         "cat ", "grep ", "curl ", "wget ",
         "./", ".\\",
     )
-    return any(s.startswith(p) for p in shell_starters)
+    return s.startswith(shell_starters)
 
 
 def _is_prose(line: str) -> bool:
@@ -464,7 +476,7 @@ def _is_prose(line: str) -> bool:
         "Do ", "Do NOT", "Don't ", "Correct ", "Below ", "Above ",
         "Step ", "Steps", "Expected ", "Should ", "Will ",
     )
-    if any(s.startswith(p) for p in prose_starters):
+    if s.startswith(prose_starters):
         return True
 
     # Markdown list items
@@ -493,15 +505,17 @@ def _guess_language(code: str) -> str:
                      "rm ", "cp ", "mv ", "ls ", "find ", "sed ", "awk ",
                      "git ", "curl ", "wget ", "tar ", "unzip ", "kill ",
                      "#!/")
+    lines = code.split("\n")
+    first_line = lines[0]
     first_real = ""
-    for line in code.split("\n"):
+    for line in lines:
         s = line.strip()
         if s and not s.startswith("#"):
             first_real = s
             break
 
-    if any(code.strip().startswith(m) or first_real.startswith(m)
-           for m in bash_starters):
+    stripped = code.strip()
+    if stripped.startswith(bash_starters) or first_real.startswith(bash_starters):
         # Make sure it's not Python that happens to use subprocess
         if "import " not in code and "def " not in code and "print(" not in code:
             return "bash"
@@ -510,10 +524,10 @@ def _guess_language(code: str) -> str:
         return "python"
     if "#include" in code or "int main" in code:
         return "c"
-    if code.strip().startswith("#!/"):
-        if "bash" in code.split("\n")[0] or "sh" in code.split("\n")[0]:
+    if stripped.startswith("#!/"):
+        if "bash" in first_line or "sh" in first_line:
             return "bash"
-        if "python" in code.split("\n")[0]:
+        if "python" in first_line:
             return "python"
 
     return "python"
@@ -523,28 +537,76 @@ def _guess_language(code: str) -> str:
 # Metadata extraction
 # ---------------------------------------------------------------------------
 
+@dataclass
+class ResponseHints:
+    """Directives the LLM put in its response text (outside the code)."""
+    filename: Optional[str] = None       # "Save as foo.py" etc.
+    timeout: Optional[int] = None        # TIMEOUT: N  (first 300 chars)
+    observe: Optional[int] = None        # OBSERVE: N  (first 500 chars)
+    packages: List[str] = field(default_factory=list)   # INSTALL: a, b
+
+# Filename patterns, highest priority first
+_FILENAME_PATTERNS = [
+    r"[Ss]ave (?:as|to|it as)\s+[`'\"]?(?P<fn0>\w[\w.-]+\.\w+)",
+    r"[Ff]ile(?:name)?:\s*[`'\"]?(?P<fn1>\w[\w.-]+\.\w+)",
+    r"[Cc]reate\s+[`'\"]?(?P<fn2>\w[\w.-]+\.\w+)",
+]
+
+# Every hint in one regex, so the response is scanned once instead of once
+# per hint. Each alternative sits in a lookahead: nothing is consumed, so
+# hints that overlap (an INSTALL: line running into TIMEOUT:) all match,
+# just as they did with separate searches.
+_HINTS_RE = re.compile("(?=" + "|".join(_FILENAME_PATTERNS + [
+    r"TIMEOUT:\s*(?P<timeout>\d+)",
+    r"OBSERVE:\s*(?P<observe>\d+)",
+    r"(?i:INSTALL):\s*(?P<install>.+)",
+]) + ")")
+
+# TIMEOUT/OBSERVE only count near the top, where the prompt asks for them
+_HINT_WINDOWS = {"timeout": 300, "observe": 500}
+
+
+def _seconds(val: Optional[str]) -> Optional[int]:
+    if val is None:
+        return None
+    n = int(val)
+    return n if 5 <= n <= 600 else None
+
+
+def extract_hints(text: str) -> ResponseHints:
+    """Parse filename, TIMEOUT, OBSERVE and INSTALL hints in one pass.
+
+    Same results as the individual extract_*_hint functions: the first
+    match of each kind wins, and filename patterns keep their priority.
+    """
+    first = {}
+    for m in _HINTS_RE.finditer(text):
+        name = m.lastgroup
+        if name in first:
+            continue
+        limit = _HINT_WINDOWS.get(name)
+        if limit is not None and m.end(name) > limit:
+            continue
+        first[name] = m.group(name)
+
+    filename = next((first[k] for k in ("fn0", "fn1", "fn2") if k in first), None)
+    install = first.get("install", "")
+    return ResponseHints(
+        filename=filename,
+        timeout=_seconds(first.get("timeout")),
+        observe=_seconds(first.get("observe")),
+        packages=[p.strip() for p in install.split(",") if p.strip()],
+    )
+
+
 def extract_filename_hint(text: str) -> Optional[str]:
     """Try to extract a filename from the LLM response."""
-    patterns = [
-        r"[Ss]ave (?:as|to|it as)\s+[`'\"]?(\w[\w.-]+\.\w+)",
-        r"[Ff]ile(?:name)?:\s*[`'\"]?(\w[\w.-]+\.\w+)",
-        r"[Cc]reate\s+[`'\"]?(\w[\w.-]+\.\w+)",
-    ]
-    for pat in patterns:
-        m = re.search(pat, text)
-        if m:
-            return m.group(1)
-    return None
+    return extract_hints(text).filename
 
 
 def extract_timeout_hint(text: str) -> Optional[int]:
     """Parse TIMEOUT: <seconds> from the top of an LLM response."""
-    m = re.search(r"TIMEOUT:\s*(\d+)", text[:300])
-    if m:
-        val = int(m.group(1))
-        if 5 <= val <= 600:
-            return val
-    return None
+    return extract_hints(text).timeout
 
 
 def extract_observe_hint(text: str) -> Optional[int]:
@@ -554,12 +616,7 @@ def extract_observe_hint(text: str) -> Optional[int]:
     child processes alive for N seconds, streaming their stdout/stderr,
     and accumulate the real terminal output for verification.
     """
-    m = re.search(r"OBSERVE:\s*(\d+)", text[:500])
-    if m:
-        val = int(m.group(1))
-        if 5 <= val <= 600:
-            return val
-    return None
+    return extract_hints(text).observe
 
 
 # ---------------------------------------------------------------------------
@@ -569,20 +626,28 @@ def extract_observe_hint(text: str) -> Optional[int]:
 SCRIPT_LANGUAGES = {"python", "py", "c", "cpp", "c++", "rust", "java",
                     "javascript", "js", "typescript", "ts", "go", "ruby"}
 
-CMD_STARTERS = re.compile(
-    r"^\s*(ps|kill|ls|cat|grep|find|i2cdetect|i2cget|i2cset|gpio|"
+_CMD_WORDS = (
+    r"(?:ps|kill|ls|cat|grep|find|i2cdetect|i2cget|i2cset|gpio|"
     r"raspi-config|systemctl|journalctl|dmesg|lsusb|lsmod|modprobe|"
     r"apt|pip|pip3|python3?|chmod|mkdir|cd|rm|cp|mv|echo|curl|wget|"
     r"uname|hostname|uptime|free|df|top|htop|which|where|"
-    r"git|make|gcc|g\+\+)\b",
-    re.IGNORECASE,
+    r"git|make|gcc|g\+\+)\b"
 )
+CMD_STARTERS = re.compile(r"^\s*" + _CMD_WORDS, re.IGNORECASE)
+# Every command line of a block in one finditer, not a match per line
+_CMD_LINE_RE = re.compile(r"^[^\S\n]*(" + _CMD_WORDS + r".*)$",
+                          re.IGNORECASE | re.MULTILINE)
 
 JUNK_PATTERNS = [
     r"^\$\s",                   # $ prompt prefix
     r"^(sudo\s+)?kill\s+\d+$",  # kill <specific PID>
     r"^pip3?\s+install\b",      # pip install (handled separately)
 ]
+_JUNK_RE = re.compile("|".join(f"(?:{p})" for p in JUNK_PATTERNS),
+                      re.IGNORECASE | re.MULTILINE)
+
+# Shell control flow / shebang anywhere in a bash block -> run it as a script
+_BASH_LOGIC_RE = re.compile(r"for |while |if |function |#!/")
 
 
 def classify_blocks(blocks: List[CodeBlock]) -> Tuple[List[CodeBlock], List[str]]:
@@ -602,29 +667,25 @@ def classify_blocks(blocks: List[CodeBlock]) -> Tuple[List[CodeBlock], List[str]
             continue
 
         # Known programming language -> script
-        if lang in SCRIPT_LANGUAGES and len(code.split("\n")) >= 1:
+        if lang in SCRIPT_LANGUAGES:
             scripts.append(block)
             continue
 
         # Bash: multi-line or has logic -> script
         if lang in ("bash", "sh", "shell", ""):
-            lines = [l for l in code.split("\n") if l.strip() and not l.strip().startswith("#")]
+            # Only need to know whether there are at least 4 real lines
+            lines = (l for l in code.split("\n")
+                     if l.strip() and not l.lstrip().startswith("#"))
 
-            if len(lines) >= 4 or any(kw in code for kw in
-                    ["for ", "while ", "if ", "function ", "#!/"]):
+            if _BASH_LOGIC_RE.search(code) or len(list(islice(lines, 4))) >= 4:
                 scripts.append(block)
                 continue
 
             # Skip junk
-            if any(re.search(p, code, re.IGNORECASE | re.MULTILINE) for p in JUNK_PATTERNS):
+            if _JUNK_RE.search(code):
                 continue
 
             # Short commands
-            for line in code.split("\n"):
-                line = line.strip()
-                if not line or line.startswith("#"):
-                    continue
-                if CMD_STARTERS.match(line):
-                    commands.append(line)
+            commands.extend(m.group(1).strip() for m in _CMD_LINE_RE.finditer(code))
 
     return scripts, commands
\ No newline at end of file
@@ -3,6 +3,7 @@
 ssh_skill.py -- SSH into Raspberry Pi and run commands / transfer files.
 
 Loads credentials from .env (PI_USER, PI_HOST, PI_PASSWORD).
+Optional: PI_SSH_COMPRESS=1 turns on SSH compression for slow links.
 
 Usage (standalone):
     python -m skills.ssh_skill --test
@@ -13,13 +14,16 @@ Usage (imported):
     result = ssh_run("uname -a", timeout=10)
 """
 
-import argparse
+import atexit
+import io
 import os
+import re
+import shlex
 import sys
 import threading
 import time
+from collections import deque
 from pathlib import Path
-from datetime import datetime
 
 try:
     import paramiko
@@ -32,19 +36,25 @@ except ImportError:
 # ---------------------------------------------------------------------------
 
 ENV_FILE = Path(__file__).resolve().parent.parent / ".env"
+_env_stamp = None   # (mtime_ns, size) of .env when it was last parsed
+# KEY=value lines; blanks, comments and malformed lines simply don't match
+_ENV_RE = re.compile(r"(?m)^[ \t]*([A-Za-z_][A-Za-z0-9_]*)[ \t]*=[ \t]*(.*?)[ \t]*$")
 
 
 def _load_env():
-    if not ENV_FILE.exists():
+    global _env_stamp
+    try:
+        st = ENV_FILE.stat()
+    except OSError:
         print(f"[ERROR] {ENV_FILE} not found. Create it with PI_USER, PI_HOST, PI_PASSWORD.")
         sys.exit(1)
-    with open(ENV_FILE) as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue
-            key, _, value = line.partition("=")
-            os.environ.setdefault(key.strip(), value.strip())
+    # Unchanged since the last parse -- its values are already in os.environ
+    stamp = (st.st_mtime_ns, st.st_size)
+    if stamp == _env_stamp:
+        return
+    _env_stamp = stamp
+    for key, value in _ENV_RE.findall(ENV_FILE.read_text()):
+        os.environ.setdefault(key, value)
 
 
 def _get_creds():
@@ -62,12 +72,47 @@ def _get_creds():
 # Connection
 # ---------------------------------------------------------------------------
 
+# One SSH connection per process, shared by every call (like OpenSSH's
+# ControlMaster). Each ssh_run / sftp_* opens a new channel on it instead
+# of paying TCP + key exchange + auth again. Callers must NOT close it.
+_client = None
+_client_lock = threading.Lock()
+KEEPALIVE_SECONDS = 30
+
+
 def _connect() -> paramiko.SSHClient:
-    user, host, password = _get_creds()
-    client = paramiko.SSHClient()
-    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-    client.connect(hostname=host, username=user, password=password, timeout=10)
-    return client
+    global _client
+    with _client_lock:
+        if _client is not None:
+            transport = _client.get_transport()
+            if transport is not None and transport.is_active():
+                return _client
+            _client.close()  # dropped -- reconnect below
+            _client = None
+        user, host, password = _get_creds()
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        # Optional zlib compression (PI_SSH_COMPRESS=1 in .env): worth it on
+        # slow/WAN links, pure CPU overhead on a LAN
+        compress = os.environ.get("PI_SSH_COMPRESS", "").lower() in ("1", "true", "yes")
+        client.connect(hostname=host, username=user, password=password, timeout=10,
+                       compress=compress)
+        # The connection sits idle while the LLM thinks (can be minutes);
+        # keepalives stop NAT/firewalls from dropping it in the meantime
+        client.get_transport().set_keepalive(KEEPALIVE_SECONDS)
+        _client = client
+        return client
+
+
+def _close_shared():
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+atexit.register(_close_shared)
 
 
 # ---------------------------------------------------------------------------
@@ -75,6 +120,46 @@ def _connect() -> paramiko.SSHClient:
 # ---------------------------------------------------------------------------
 
 REMOTE_WORK_DIR = "/home/scoobyxd/Documents"
+OUTPUT_CAP_CHARS = 64 * 1024   # per stream kept by ssh_run_live; it all still streams live
+
+
+class _HeadTail:
+    """Text sink that keeps the first and last max_chars/2 of what it's fed.
+
+    A chatty remote script can print far more than anyone will read back;
+    this bounds memory at capture time instead of slicing afterwards.
+    """
+
+    def __init__(self, max_chars: int):
+        self._half = max_chars // 2
+        self._head = []
+        self._head_len = 0
+        self._tail = deque()
+        self._tail_len = 0
+        self._skipped = 0
+
+    def append(self, chunk: str):
+        room = self._half - self._head_len
+        if room > 0:
+            self._head.append(chunk[:room])
+            self._head_len += len(chunk[:room])
+            chunk = chunk[room:]
+        if not chunk:
+            return
+        self._tail.append(chunk)
+        self._tail_len += len(chunk)
+        # Drop whole chunks that fall entirely outside the tail window
+        while self._tail_len - len(self._tail[0]) >= self._half:
+            dropped = self._tail.popleft()
+            self._tail_len -= len(dropped)
+            self._skipped += len(dropped)
+
+    def text(self) -> str:
+        tail = "".join(self._tail)
+        skipped = self._skipped + max(0, len(tail) - self._half)
+        tail = tail[-self._half:] if skipped else tail
+        note = f"\n... ({skipped} chars omitted) ...\n" if skipped else ""
+        return "".join(self._head) + note + tail
 
 
 def ssh_run(command: str, timeout: int = 30) -> dict:
@@ -119,7 +204,6 @@ def ssh_run(command: str, timeout: int = 30) -> dict:
                 channel.close()
             except Exception:
                 pass
-            client.close()
             return {"stdout": out, "stderr": err, "exit_code": -1,
                     "success": False, "timed_out": True}
 
@@ -134,7 +218,6 @@ def ssh_run(command: str, timeout: int = 30) -> dict:
         except Exception:
             pass
         channel.close()
-        client.close()
 
         ec = exit_code[0] if exit_code[0] is not None else -1
         return {"stdout": out, "stderr": err, "exit_code": ec,
@@ -148,11 +231,15 @@ def ssh_run(command: str, timeout: int = 30) -> dict:
                 "exit_code": -1, "success": False, "timed_out": False}
 
 
-def ssh_run_live(command: str, timeout: int = 30, label: str = "") -> dict:
+def ssh_run_live(command: str, timeout: int = 30, label: str = "",
+                 max_chars: int = OUTPUT_CAP_CHARS, hide: tuple = ()) -> dict:
     """Run a command on Pi via SSH with LIVE terminal output.
 
     Streams stdout/stderr to the local terminal in real-time so you
-    can watch execution as it happens. Returns the same dict as ssh_run.
+    can watch execution as it happens. Returns the same dict as ssh_run,
+    except each stream keeps only its first and last max_chars/2.
+    Stdout lines listed in `hide` (internal markers) are kept in the
+    result but not printed.
     """
     prefix = f"  [{label}]" if label else "  [PI]"
     separator = f"{'─' * 50}"
@@ -168,8 +255,8 @@ def ssh_run_live(command: str, timeout: int = 30, label: str = "") -> dict:
         print(f"{prefix} │ $ {command[:80]}{'...' if len(command) > 80 else ''}")
         print(f"{prefix} ├{separator}")
 
-        out_buf = []
-        err_buf = []
+        out_buf = _HeadTail(max_chars)
+        err_buf = _HeadTail(max_chars)
         exit_code = [None]
 
         def wait_for_exit():
@@ -190,7 +277,7 @@ def ssh_run_live(command: str, timeout: int = 30, label: str = "") -> dict:
                 out_buf.append(chunk)
                 for line in chunk.splitlines(keepends=True):
                     clean = line.rstrip('\n\r')
-                    if clean:
+                    if clean and clean not in hide:
                         print(f"{prefix} │ {clean}")
 
             # Check stderr
@@ -211,7 +298,7 @@ def ssh_run_live(command: str, timeout: int = 30, label: str = "") -> dict:
                     out_buf.append(chunk)
                     for line in chunk.splitlines(keepends=True):
                         clean = line.rstrip('\n\r')
-                        if clean:
+                        if clean and clean not in hide:
                             print(f"{prefix} │ {clean}")
                 while channel.recv_stderr_ready():
                     chunk = channel.recv_stderr(4096).decode("utf-8", errors="replace")
@@ -225,8 +312,8 @@ def ssh_run_live(command: str, timeout: int = 30, label: str = "") -> dict:
             time.sleep(0.1)
 
         timed_out = waiter.is_alive()
-        stdout = "".join(out_buf)
-        stderr = "".join(err_buf)
+        stdout = out_buf.text()
+        stderr = err_buf.text()
         ec = exit_code[0] if exit_code[0] is not None else -1
 
         if timed_out:
@@ -240,7 +327,6 @@ def ssh_run_live(command: str, timeout: int = 30, label: str = "") -> dict:
             channel.close()
         except Exception:
             pass
-        client.close()
 
         return {"stdout": stdout, "stderr": stderr, "exit_code": ec,
                 "success": ec == 0, "timed_out": timed_out}
@@ -256,9 +342,13 @@ def ssh_run_live(command: str, timeout: int = 30, label: str = "") -> dict:
 
 
 
-def ssh_run_detached(command: str) -> dict:
-    """Fire-and-forget: launch a command via nohup. Returns immediately with PID."""
-    wrapped = f"nohup {command} > /dev/null 2>&1 & echo $!"
+def ssh_run_detached(command: str, log_path: str = "/dev/null") -> dict:
+    """Fire-and-forget: launch a command via nohup. Returns immediately with PID.
+
+    The command runs under `sh -c`, so compound commands (cd x && ...) are
+    detached as a whole. stdout+stderr go to log_path.
+    """
+    wrapped = f"nohup sh -c {shlex.quote(command)} > {log_path} 2>&1 & echo $!"
     result = ssh_run(wrapped, timeout=10)
     return {"success": result["success"], "pid": result.get("stdout", "").strip(),
             "stderr": result.get("stderr", "")}
@@ -271,7 +361,18 @@ def sftp_upload(local_path: str, remote_path: str) -> dict:
         sftp = client.open_sftp()
         sftp.put(local_path, remote_path)
         sftp.close()
-        client.close()
+        return {"success": True, "stderr": ""}
+    except Exception as e:
+        return {"success": False, "stderr": f"[ERROR] Upload failed: {e}"}
+
+
+def sftp_upload_bytes(data: bytes, remote_path: str) -> dict:
+    """Upload in-memory bytes to a file on Pi (no local file read)."""
+    try:
+        client = _connect()
+        sftp = client.open_sftp()
+        sftp.putfo(io.BytesIO(data), remote_path)
+        sftp.close()
         return {"success": True, "stderr": ""}
     except Exception as e:
         return {"success": False, "stderr": f"[ERROR] Upload failed: {e}"}
@@ -284,7 +385,6 @@ def sftp_download(remote_path: str, local_path: str) -> dict:
         sftp = client.open_sftp()
         sftp.get(remote_path, local_path)
         sftp.close()
-        client.close()
         return {"success": True, "stderr": ""}
     except Exception as e:
         return {"success": False, "stderr": f"[ERROR] Download failed: {e}"}
@@ -295,6 +395,7 @@ def sftp_download(remote_path: str, local_path: str) -> dict:
 # ---------------------------------------------------------------------------
 
 def main():
+    import argparse
     parser = argparse.ArgumentParser(description="SSH Skill -- Raspberry Pi")
     parser.add_argument("--test", action="store_true", help="Quick connectivity test")
     parser.add_argument("--run", type=str, help="Run a command on Pi")